@@ -1,46 +1,134 @@
 import streamlit as st
 from langchain_openai import ChatOpenAI
-from langchain.memory import ConversationBufferMemory
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain.agents import AgentType, initialize_agent
 from langchain.tools import Tool
+from langchain.agents.conversational_chat.prompt import SUFFIX
 from langchain.prompts import MessagesPlaceholder
+from langchain.globals import set_llm_cache
+from langchain_core.caches import InMemoryCache
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
-from datetime import datetime
+import time
+import json
+import re
+from itertools import groupby
+from datetime import date
+from functools import partial
 from decouple import config
 
-
-
-class StreamHandler(StreamingStdOutCallbackHandler):
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+
+LLM_CACHE_SIZE = 256
+SUMMARY_TOKENIZER_MODEL = "gpt-3.5-turbo"
+FLIGHT_CACHE_TTL = 300
+VISIBLE_MESSAGES = 50
+STREAM_FLUSH_INTERVAL = 1 / 30
+FINAL_ANSWER_MARKER = "Final Answer:"
+FLIGHT_FMT = "{i}. Flight: QR{flightNumber}, Departure Time: {departureDateScheduled}, Arrival Time: {arrivalDateScheduled}, Status: {flightStatus}"
+IATA_RE = re.compile(r"^[A-Z]{3}$")
+QA_URL = 'https://qoreservices.qatarairways.com/fltstatus-services/flight/getStatus'
+
+# Static system prompt; anything that varies per day or turn is appended after it
+SYSTEM_MESSAGE = """You are an AI assistant specializing in Qatar Airways flights, with a focus on flights to and from Doha Hamad International Airport (DOH).
+Your primary function is to provide information about Qatar Airways flights, their schedules, and general information about traveling with Qatar Airways.
+When using the Flight Information tool, always provide both the departure and arrival airport codes, separated by a comma.
+Only use the provided flight information tool when specific flight details are requested.
+If asked about flights from other airlines, politely explain that you can only provide information about Qatar Airways flights.
+Be helpful, concise, and friendly in your responses.
+"""
+
+# Reuse connections to the flight status service across tool calls
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+
+@st.cache_resource
+def init_llm_cache() -> InMemoryCache:
+    """Install the process-wide LLM cache once, rather than replacing it on every rerun"""
+    cache = InMemoryCache(maxsize=LLM_CACHE_SIZE)
+    set_llm_cache(cache)
+    return cache
+
+
+# Short-circuit identical prompts instead of sending them to the LLM again
+init_llm_cache()
+
+
+class StreamHandler(BaseCallbackHandler):
     """Stream tokens to the UI while capturing tool output for console logging."""
 
+    # Streamlit calls must stay on the script thread, also on the async agent path
+    run_inline = True
+
     def __init__(self, container):
-        super().__init__()
         self.container = container
-        self.full_text = ""
         self.display_text = ""
         self.final_answer_started = False
         self.debug_text = ""
+        self._tail = ""
+        self._last_flush = 0.0
+        # Latency spans, surfaced in the debug expander
+        self.t_start = time.perf_counter()
+        self.t_first_token = None
+        self._t_tool = None
+        self.tool_ms = 0.0
+        self.render_ms = 0.0
+
+    def timings(self) -> dict:
+        """Return the latency spans collected so far, in milliseconds"""
+        ttft = self.t_first_token - self.t_start if self.t_first_token is not None else 0.0
+        return {
+            "ttft_ms": round(ttft * 1000, 1),
+            "total_ms": round((time.perf_counter() - self.t_start) * 1000, 1),
+            "tool_ms": round(self.tool_ms, 1),
+            "render_ms": round(self.render_ms, 1),
+        }
+
+    def _flush(self) -> None:
+        # Plain code block while streaming; markdown is rendered once at the end
+        self.container.code(self.display_text, language="markdown")
+        self._last_flush = time.monotonic()
 
     def on_llm_new_token(self, token: str, **kwargs) -> None:
-        self.full_text += token
+        if self.t_first_token is None:
+            self.t_first_token = time.perf_counter()
 
         if not self.final_answer_started:
-            if "Final Answer:" in self.full_text:
+            # Only the last few characters plus the new token can complete the marker
+            window = self._tail + token
+            if FINAL_ANSWER_MARKER in window:
                 self.final_answer_started = True
-                _, after = self.full_text.split("Final Answer:", 1)
+                _, after = window.split(FINAL_ANSWER_MARKER, 1)
                 self.display_text = after
+            else:
+                self._tail = window[-(len(FINAL_ANSWER_MARKER) - 1):]
         else:
             self.display_text += token
 
         if self.final_answer_started:
-            self.container.markdown(self.display_text)
+            # Redraw at most ~30 times per second; on_llm_end flushes the rest
+            if time.monotonic() - self._last_flush >= STREAM_FLUSH_INTERVAL:
+                self._flush()
 
     def on_llm_end(self, response, **kwargs) -> None:
-        # Ensure final response is flushed to the UI
+        # Ensure final response is flushed to the UI as rendered markdown
         if self.final_answer_started:
+            t0 = time.perf_counter()
             self.container.markdown(self.display_text)
+            self.render_ms += (time.perf_counter() - t0) * 1000
 
     def on_agent_action(self, action, **kwargs) -> None:
         # Store agent action for later display in expander
@@ -48,39 +136,255 @@ class StreamHandler(StreamingStdOutCallbackHandler):
         self.debug_text += action_text + "\n\n---\n\n"
         print(f"Agent action: {action}")
 
+    def on_tool_start(self, serialized, input_str: str, **kwargs) -> None:
+        self._t_tool = time.perf_counter()
+
     def on_tool_end(self, output: str, **kwargs) -> None:
+        if self._t_tool is not None:
+            self.tool_ms += (time.perf_counter() - self._t_tool) * 1000
+            self._t_tool = None
         # Store tool output for later display in expander
         output_text = f"**Tool Output:** {output}\n\n---\n\n"
         self.debug_text += output_text
         print(f"Tool output: {output}")
 
-def get_flight_info(query: str) -> str:
-    """Function to return Qatar Airways flight information between specified airports"""
-    try:
-        departure, arrival = query.split(',')
-        departure = departure.strip().upper()
-        arrival = arrival.strip().upper()
-    except ValueError:
-        return "Error: Please provide both departure and arrival airport codes separated by a comma (e.g., 'DOH,DXB')."
+class FlightFields(dict):
+    """Flight record for FLIGHT_FMT that renders missing fields as N/A instead of raising"""
 
+    def __missing__(self, key):
+        return "N/A"
 
-    qa_url = 'https://qoreservices.qatarairways.com/fltstatus-services/flight/getStatus'
-    params = {
+def flight_params(departure: str, arrival: str, scheduled_date: str) -> dict:
+    """Build the flight status request body for a route and date"""
+    return {
         "departureStation": departure,
         "arrivalStation": arrival,
-        "scheduledDate": datetime.now().strftime("%Y-%m-%d"),
+        "scheduledDate": scheduled_date,
         "appLocale": "en"
     }
-    response = requests.post(qa_url, json=params)
-    flights = response.json().get('flights', [])
-    text_flights = f'Flights from {departure} to {arrival} on {datetime.now().strftime("%d-%B-%Y")}:\n'
-    counter = 1
-    for flight in flights:
-        record = f"{counter}. Flight: QR{flight['flightNumber']}, Departure Time: {flight['departureDateScheduled']}, Arrival Time: {flight['arrivalDateScheduled']}, Status: {flight['flightStatus']}\n"
-        text_flights += record
-        counter += 1
 
-    return text_flights
+def parse_route(query: str) -> tuple:
+    """Split a 'DOH,DXB' style query into upper-cased departure and arrival codes.
+
+    Raises ValueError unless both codes are three-letter IATA codes, so bad agent
+    input is rejected before any request is made.
+    """
+    departure, arrival = query.split(',')
+    departure = departure.strip().upper()
+    arrival = arrival.strip().upper()
+    if not (IATA_RE.match(departure) and IATA_RE.match(arrival)):
+        raise ValueError(f"Invalid IATA codes: {departure!r}, {arrival!r}")
+    return departure, arrival
+
+def format_flights(departure: str, arrival: str, flights: list, date_str: str) -> str:
+    """Render a flight list as text for the agent"""
+    lines = [f'Flights from {departure} to {arrival} on {date_str}:']
+    lines.extend(FLIGHT_FMT.format_map(FlightFields(flight, i=i)) for i, flight in enumerate(flights, 1))
+    return "\n".join(lines)
+
+@st.cache_data(ttl=FLIGHT_CACHE_TTL, show_spinner=False)
+def fetch_flights(departure: str, arrival: str, scheduled_date: str) -> list:
+    """Fetch the raw flight list for a route and date, cached for a few minutes.
+
+    Raises on an HTTP error status, so an error body is neither cached nor read as no flights.
+    """
+    response = _SESSION.post(QA_URL, json=flight_params(departure, arrival, scheduled_date), timeout=(3, 10))
+    response.raise_for_status()
+    return json_loads(response.content).get('flights', [])
+
+def get_flight_info(query: str, today: date = None) -> str:
+    """Function to return Qatar Airways flight information between specified airports"""
+    try:
+        departure, arrival = parse_route(query)
+    except ValueError:
+        return "Error: Please provide both departure and arrival as three-letter IATA airport codes separated by a comma (e.g., 'DOH,DXB')."
+
+    today = today or date.today()
+    try:
+        flights = fetch_flights(departure, arrival, today.isoformat())
+    except requests.RequestException as e:
+        return f"Error fetching flights from {departure} to {arrival}: {e}"
+    return format_flights(departure, arrival, flights, today.strftime("%d-%B-%Y"))
+
+async def _gather_routes(routes: list, scheduled_date: str) -> list:
+    """Fetch several routes concurrently, returning flights or the exception per route.
+
+    Each route goes through the cached, pooled fetch_flights in a worker thread, so
+    routes looked up recently skip the network.
+    """
+    return await asyncio.gather(
+        *(asyncio.to_thread(fetch_flights, departure, arrival, scheduled_date) for departure, arrival in routes),
+        return_exceptions=True
+    )
+
+async def get_flight_info_async(query: str, today: date = None) -> str:
+    """Async variant of get_flight_info that keeps the cached, pooled lookup off the event loop"""
+    return await asyncio.to_thread(get_flight_info, query, today)
+
+async def get_flight_info_batch_async(query: str, today: date = None) -> str:
+    """Function to return Qatar Airways flight information for several routes at once"""
+    try:
+        routes = [parse_route(pair) for pair in query.split(';') if pair.strip()]
+    except ValueError:
+        return "Error: Please provide routes as three-letter IATA departure and arrival airport codes separated by a comma, with routes separated by a semicolon (e.g., 'DOH,DXB;DOH,LHR')."
+    if not routes:
+        return "Error: Please provide at least one route (e.g., 'DOH,DXB;DOH,LHR')."
+
+    today = today or date.today()
+    date_str = today.strftime("%d-%B-%Y")
+    results = await _gather_routes(routes, today.isoformat())
+    texts = []
+    for (departure, arrival), flights in zip(routes, results):
+        if isinstance(flights, Exception):
+            texts.append(f"Error fetching flights from {departure} to {arrival}: {flights}")
+        else:
+            texts.append(format_flights(departure, arrival, flights, date_str))
+
+    return "\n\n".join(texts)
+
+def get_flight_info_batch(query: str, today: date = None) -> str:
+    """Synchronous wrapper around get_flight_info_batch_async"""
+    return asyncio.run(get_flight_info_batch_async(query, today))
+
+async def run_agent(agent, prompt: str, stream_handler) -> str:
+    """Run one agent turn on the async path so tool I/O and LLM streaming don't block each other"""
+    result = await agent.ainvoke({"input": prompt}, {"callbacks": [stream_handler]})
+    return result["output"]
+
+
+@st.cache_data
+def load_logo(path: str):
+    """Read the logo once instead of hitting the filesystem on every rerun"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def render_messages(messages: list) -> None:
+    """Render chat messages, merging consecutive messages from the same role into one block"""
+    for role, group in groupby(messages, key=lambda message: message["role"]):
+        with st.chat_message(role):
+            st.markdown("\n\n".join(message["content"] for message in group))
+
+
+def build_agent(api_endpoint: str, model_name: str, api_key: str, today: date):
+    """Create the flight information agent with its LLM, tools and memory.
+
+    The agent is bound to ``today``: the tools query that date and the prompt
+    states it, so both always agree even across midnight.
+    """
+    # Initialize ChatOpenAI and memory
+    llm = ChatOpenAI(
+        openai_api_key=api_key,
+        model_name=model_name,
+        openai_api_base=api_endpoint,
+        streaming=True
+    )
+    # Older turns are folded into a running summary to keep the prompt bounded.
+    # The buffer is measured with ChatOpenAI's token counter, which only knows OpenAI
+    # model names, so the summariser counts with a GPT tokenizer whatever model serves it.
+    summary_llm = ChatOpenAI(
+        openai_api_key=api_key,
+        model_name=model_name,
+        openai_api_base=api_endpoint,
+        tiktoken_model_name=SUMMARY_TOKENIZER_MODEL
+    )
+    memory = ConversationSummaryBufferMemory(
+        llm=summary_llm,
+        memory_key="chat_history",
+        return_messages=True,
+        max_token_limit=1000
+    )
+
+    # Create the flight info tool
+    flight_tool = Tool(
+        name="Flight Information",
+        func=partial(get_flight_info, today=today),
+        coroutine=partial(get_flight_info_async, today=today),
+        description="Use this tool to get Qatar Airways flight information between two airports. Input should be two airport codes separated by a comma (e.g., 'DOH,DXB' for flights from Doha to Dubai)."
+    )
+    flight_batch_tool = Tool(
+        name="Flight Information (batch)",
+        func=partial(get_flight_info_batch, today=today),
+        coroutine=partial(get_flight_info_batch_async, today=today),
+        description="Use this tool to get Qatar Airways flight information for several routes in one call. Input should be routes separated by a semicolon, each route being two airport codes separated by a comma (e.g., 'DOH,DXB;DOH,LHR')."
+    )
+
+    # Keep the date out of the system prompt so the prompt prefix stays byte-identical;
+    # it rides along with the per-turn human message instead
+    human_message = f"Today's date is {today.strftime('%d-%B-%Y')}.\n\n{SUFFIX}"
+
+    # Initialize the agent with the tool and the system message
+    agent = initialize_agent(
+        tools=[flight_tool, flight_batch_tool],
+        llm=llm,
+        agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
+        memory=memory,
+        handle_parsing_errors=True,
+        agent_kwargs={
+            "system_message": SYSTEM_MESSAGE,
+            "human_message": human_message,
+            "extra_prompt_messages": [MessagesPlaceholder(variable_name="chat_history")]
+        }
+    )
+    return agent
+
+
+@st.fragment
+def chat_panel(api_endpoint: str, model_name: str, api_key: str, required_fields_filled: bool) -> None:
+    """Chat history and input; reruns on its own so a chat turn doesn't rebuild the page"""
+    # Display chat messages, keeping only the most recent ones expanded
+    older_messages = st.session_state.messages[:-VISIBLE_MESSAGES]
+    recent_messages = st.session_state.messages[-VISIBLE_MESSAGES:]
+    if older_messages:
+        with st.expander(f"Show {len(older_messages)} earlier messages"):
+            render_messages(older_messages)
+    render_messages(recent_messages)
+
+    # Chat input - now conditional
+    if required_fields_filled:
+        if prompt := st.chat_input("You:"):
+            st.session_state.messages.append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
+
+            # Reuse this session's agent (and its memory) while settings and date are unchanged
+            agent_key = (api_endpoint, model_name, api_key, date.today())
+            if st.session_state.get("agent_key") != agent_key:
+                st.session_state.agent = build_agent(*agent_key)
+                st.session_state.agent_key = agent_key
+            agent = st.session_state.agent
+
+            # Generate AI response
+            response = None
+            with st.chat_message("assistant"):
+                response_container = st.empty()
+                stream_handler = StreamHandler(response_container)
+                try:
+                    with st.spinner("🤖 Thinking and searching for flight information..."):
+                        response = asyncio.run(run_agent(agent, prompt, stream_handler))
+
+                    # Display timings and debug information in an expander
+                    with st.expander("🔧 Agent Actions & Tool Outputs", expanded=False):
+                        st.table([stream_handler.timings()])
+                        if stream_handler.debug_text:
+                            st.markdown(stream_handler.debug_text)
+
+                    st.session_state.messages.append({"role": "assistant", "content": response})
+                    # The stream handler already rendered the final answer; only draw it
+                    # here when nothing was streamed (e.g. an LLM cache hit)
+                    if not stream_handler.final_answer_started:
+                        response_container.markdown(response)
+                
+                
+                except Exception as e:
+                    error_message = f"An error occurred: {str(e)}"
+                    response_container.error(error_message)
+                    response = error_message
+    else:
+        # Disabled chat input
+        st.chat_input("You:", disabled=True)
 
 
 # Sidebar for user input
@@ -99,13 +403,14 @@ if not required_fields_filled:
 # Clear chat button
 if st.sidebar.button("Clear Chat"):
     st.session_state.messages = []
-    st.rerun()
+    st.session_state.pop("agent_key", None)
 
 # Main chat interface
 # Display Qatar Airways logo
 logo_path = './logo.png'
-if os.path.exists(logo_path):
-    st.image(logo_path, width=200)
+logo = load_logo(logo_path)
+if logo is not None:
+    st.image(logo, width=200)
 else:
     st.warning("Logo file not found. Please ensure 'logo.png' is in the same directory as this script.")
 
@@ -115,85 +420,6 @@ st.title("Qatar Airways Flight Information Chatbot")
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
-
-# Chat input - now conditional
-if required_fields_filled:
-    if prompt := st.chat_input("You:"):
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.markdown(prompt)
-
-        # Initialize ChatOpenAI and memory
-        llm = ChatOpenAI(
-            openai_api_key=api_key,
-            model_name=model_name,
-            openai_api_base=api_endpoint,
-            streaming=True
-        )
-        memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-
-        # Create the flight info tool
-        flight_tool = Tool(
-            name="Flight Information",
-            func=get_flight_info,
-            description="Use this tool to get Qatar Airways flight information between two airports. Input should be two airport codes separated by a comma (e.g., 'DOH,DXB' for flights from Doha to Dubai)."
-        )
-
-        # Define the system message to control the chatbot's behavior
-        system_message = f"""You are an AI assistant specializing in Qatar Airways flights, with a focus on flights to and from Doha Hamad International Airport (DOH). 
-        Your primary function is to provide information about Qatar Airways flights, their schedules, and general information about traveling with Qatar Airways.
-        When using the Flight Information tool, always provide both the departure and arrival airport codes, separated by a comma.
-        Only use the provided flight information tool when specific flight details are requested.
-        If asked about flights from other airlines, politely explain that you can only provide information about Qatar Airways flights.
-        Be helpful, concise, and friendly in your responses.
-        
-        Today's date is {datetime.now().strftime("%d-%B-%Y")}.
-        """
-
-        # Initialize the agent with the tool and the system message
-        agent = initialize_agent(
-            tools=[flight_tool],
-            llm=llm,
-            agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
-            memory=memory,
-            handle_parsing_errors=True,
-            agent_kwargs={
-                "system_message": system_message,
-                "extra_prompt_messages": [MessagesPlaceholder(variable_name="chat_history")]
-            }
-        )
-
-        # Generate AI response
-        response = None
-        with st.chat_message("assistant"):
-            response_container = st.empty()
-            stream_handler = StreamHandler(response_container)
-            try:
-                with st.spinner("🤖 Thinking and searching for flight information..."):
-                    response = agent.run(
-                        input=prompt,
-                        callbacks=[stream_handler]
-                    )
-
-                # Display debug information in an expander
-                if stream_handler.debug_text:
-                    with st.expander("🔧 Agent Actions & Tool Outputs", expanded=False):
-                        st.markdown(stream_handler.debug_text)
-
-                st.session_state.messages.append({"role": "assistant", "content": response})
-                response_container.markdown(response)
-                
-                
-            except Exception as e:
-                error_message = f"An error occurred: {str(e)}"
-                response_container.error(error_message)
-                response = error_message
-else:
-    # Disabled chat input
-    st.chat_input("You:", disabled=True)
+chat_panel(api_endpoint, model_name, api_key, required_fields_filled)
 
 # Run the app: streamlit run chatbot_app.py
@@ -4,42 +4,482 @@ import pandas as pd
 import os
 from dotenv import load_dotenv
 import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tools import (
     fetch_available_models,
     create_s3_client,
     list_s3_buckets,
     list_pdf_files,
     generate_presigned_url,
+    generate_presigned_urls,
     download_pdf_from_s3,
-    convert_pdf_to_markdown,
-    convert_markdown_to_pdf,
+    download_sibling_markdown,
+    convert_pdf_to_markdown_chunks,
+    split_markdown,
+    MARKDOWN_CHUNK_CHARS,
     upload_markdown_to_s3,
-    upload_pdf_to_s3,
-    translate_markdown_with_llm
+    translate_pdf_to_s3,
+    translate_markdown_with_llm_stream,
+    sibling_markdown_key,
+    raise_on_failure,
+    call_cached
 )
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Upper bound on concurrent (file, language) translations
+MAX_TRANSLATION_WORKERS = 8
+
+# Upper bound on concurrent S3 downloads
+MAX_DOWNLOAD_WORKERS = 8
+
+# Presigned links are valid for an hour; regenerate them well before that
+PRESIGNED_URL_REFRESH = 1800
+
+# Output format labels shown in the UI and the format names translate_pdf_to_s3 accepts
+OUTPUT_FORMATS = {"PDF": "pdf", "Markdown": "markdown"}
+
+@st.cache_resource(show_spinner=False)
+def get_s3_client(access_key, secret_key, endpoint_url, verify_ssl):
+    """Create an S3 client once per credential set and share it (and its connection pool) across reruns.
+
+    Failures raise FailedResult so they aren't cached; use call_cached for a result tuple.
+    """
+    return raise_on_failure(create_s3_client(access_key, secret_key, endpoint_url, verify_ssl))
+
+
+@st.cache_data(ttl=300, show_spinner="Fetching available models...")
+def cached_fetch_available_models(api_endpoint, api_key_hash, _api_key):
+    """Fetch available models, reusing the result across reruns while endpoint and key are unchanged.
+
+    The cache is keyed on a digest of the API key rather than the key itself. Failures
+    raise FailedResult so they aren't cached; use call_cached for a result tuple.
+    """
+    return raise_on_failure(fetch_available_models(api_endpoint, _api_key))
+
+
+def api_key_digest(api_key):
+    """Short, non-reversible fingerprint of an API key for use in cache keys."""
+    return hashlib.blake2b(api_key.encode('utf-8'), digest_size=8).hexdigest()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_list_pdf_files(_s3_client, s3_url, access_key, bucket_name):
+    """List PDF files in a bucket, cached per endpoint, access key and bucket.
+
+    The client itself is not hashable, so the endpoint and access key stand in for it.
+    Failures raise FailedResult so they aren't cached; use call_cached for a result tuple.
+    """
+    return raise_on_failure(list_pdf_files(_s3_client, bucket_name))
+
+
+def get_presigned_urls(s3_client, bucket_name, pdf_files):
+    """Return presigned URLs for the listed PDFs, generated once per bucket and reused across reruns."""
+    cache_key = f"presigns_{bucket_name}"
+    names = [pdf['name'] for pdf in pdf_files]
+    cached = st.session_state.get(cache_key)
+    
+    if cached is None or cached['names'] != names or time.time() - cached['created'] > PRESIGNED_URL_REFRESH:
+        urls, _ = generate_presigned_urls(s3_client, bucket_name, names)
+        cached = {'names': names, 'urls': urls, 'created': time.time()}
+        st.session_state[cache_key] = cached
+    
+    return cached['urls']
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_pdf_to_markdown_chunks(pdf_sha256, _pdf_content):
+    """Convert a PDF to markdown chunks, memoised on the SHA-256 of its bytes.
+
+    Re-running a translation (e.g. to add a language) skips the markdrop pass. Failures
+    raise FailedResult so they aren't cached; use call_cached for a result tuple.
+    """
+    return raise_on_failure(convert_pdf_to_markdown_chunks(_pdf_content))
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=900)
+def cached_download_pdf(_s3_client, s3_url, access_key, bucket_name, object_key, etag, size):
+    """Download a PDF, memoised on its bucket, key and ETag.
+
+    The ETag comes free with the bucket listing, so a changed object misses the cache
+    while a repeat translation of the same file skips the GET. Failures raise FailedResult
+    so they aren't cached; use call_cached for a result tuple.
+    """
+    return raise_on_failure(download_pdf_from_s3(_s3_client, bucket_name, object_key, size))
+
+
+@st.fragment
+def render_translation_panel(pdf_files, selected_bucket, s3_url, s3_access_key, api_key, api_endpoint, model_name, temperature):
+    """Document picker, output options and translation run for the selected bucket.
+
+    Runs as a fragment so ticking a document or choosing a language reruns only this
+    panel, not the bucket listing and sidebar above it. Selection and translation share
+    one fragment because the translate button depends on the current selection.
+    """
+    # Display PDF files as a list with checkboxes
+    st.subheader("📄 Select Documents")
+    
+    # Presign all links in one pass instead of once per row per rerun
+    presigned_urls = get_presigned_urls(st.session_state.s3_client, selected_bucket, pdf_files)
+    
+    # One data editor instead of a row of widgets per file. The frame is
+    # rebuilt identically on each rerun, so the editor keeps its own
+    # checkbox state under the per-bucket key.
+    pdf_table = pd.DataFrame({
+        'Select': [False] * len(pdf_files),
+        'File': [pdf['name'] for pdf in pdf_files],
+        'Size': [f"{pdf['size']:,} bytes" for pdf in pdf_files],
+        'Link': [presigned_urls.get(pdf['name']) for pdf in pdf_files]
+    })
+    
+    edited_table = st.data_editor(
+        pdf_table,
+        column_config={
+            'Select': st.column_config.CheckboxColumn("Select"),
+            'File': st.column_config.TextColumn("File Name"),
+            'Link': st.column_config.LinkColumn("Link", display_text="📄 Open")
+        },
+        disabled=['File', 'Size', 'Link'],
+        hide_index=True,
+        num_rows='fixed',
+        use_container_width=True,
+        key=f"pdf_table_{selected_bucket}"
+    )
+    
+    selected_pdf_indices = edited_table.index[edited_table['Select']].tolist()
+    
+    # Update session state
+    st.session_state.selected_pdf_indices = selected_pdf_indices
+    
+    # Get selected PDF files
+    selected_pdfs = [pdf_files[i] for i in selected_pdf_indices]
+    st.session_state.selected_pdfs = selected_pdfs
+    
+    # Add conversion section
+    st.markdown("---")
+    
+    # Output bucket selection
+    st.subheader("📤 Select Output Bucket")
+    
+    # Output bucket selection dropdown (same options as input buckets)
+    output_bucket = st.selectbox(
+        "Choose output bucket for translated documents:",
+        options=st.session_state.bucket_names,
+        index=0,
+        help="Select a bucket where the translated documents will be uploaded"
+    )
+    
+    # Update session state when output bucket selection changes
+    if output_bucket != st.session_state.output_bucket:
+        st.session_state.output_bucket = output_bucket
+    
+    # Language selection
+    st.subheader("🌐 Select Languages")
+    
+    # Load languages from environment variable
+    languages_env = os.getenv("LANGUAGES", "")
+    if languages_env:
+        # Parse comma-separated languages and clean them
+        available_languages = [lang.strip() for lang in languages_env.split(",") if lang.strip()]
+    else:
+        # Default languages if LANGUAGES env var is not set
+        available_languages = [
+            "English", "Spanish", "French", "German", "Italian", 
+            "Portuguese", "Russian", "Chinese", "Japanese", "Korean",
+            "Arabic", "Hindi", "Dutch", "Swedish", "Norwegian"
+        ]
+    
+    if available_languages:
+        # Multi-select for languages
+        selected_languages = st.multiselect(
+            "Choose target languages for translation:",
+            options=available_languages,
+            default=st.session_state.selected_languages,
+            help="Select one or more languages to translate the documents to"
+        )
+        
+        # Update session state
+        st.session_state.selected_languages = selected_languages
+        
+        # Display selected languages
+        if selected_languages:
+            st.info(f"Selected languages: {', '.join(selected_languages)}")
+        else:
+            st.warning("Please select at least one language for translation")
+    else:
+        st.warning("No languages available. Please set the LANGUAGES environment variable with comma-separated language names.")
+        selected_languages = []
+    
+    # Output formats; markdown-only skips rendering the translated PDF
+    selected_formats = st.multiselect(
+        "Choose output formats:",
+        options=list(OUTPUT_FORMATS),
+        default=["PDF"],
+        help="Translated documents are uploaded in each selected format"
+    )
+    output_formats = frozenset(OUTPUT_FORMATS[label] for label in selected_formats)
+    
+    # Convert button - disabled when no files selected, no output bucket selected, no languages or no formats selected
+    can_convert = len(selected_pdfs) > 0 and st.session_state.output_bucket and len(selected_languages) > 0 and len(output_formats) > 0
+    
+    # Prepare help text based on selected languages
+    if can_convert:
+        help_text = f"Translate selected documents to: {', '.join(selected_languages)}"
+    else:
+        if len(selected_pdfs) == 0:
+            help_text = "Please select documents to process"
+        elif not st.session_state.output_bucket:
+            help_text = "Please select an output bucket"
+        elif len(selected_languages) == 0:
+            help_text = "Please select at least one language for translation"
+        else:
+            help_text = "Please select at least one output format"
+    
+    s3_client = st.session_state.s3_client
+    
+    def fetch_source(pdf):
+        """Return (markdown_chunks, pdf_content, message) for one selected PDF.
+
+        A sibling .md next to the PDF that is at least as new as the PDF is used as-is,
+        skipping both the PDF download and the markdrop conversion.
+        """
+        markdown_content, _ = download_sibling_markdown(
+            s3_client, selected_bucket, pdf['name'], not_before=pdf['last_modified']
+        )
+        if markdown_content:
+            return split_markdown(markdown_content, MARKDOWN_CHUNK_CHARS), None, "success"
+        pdf_content, download_msg = call_cached(
+            cached_download_pdf,
+            s3_client,
+            s3_url,
+            s3_access_key,
+            selected_bucket,
+            pdf['name'],
+            pdf['etag'],
+            pdf['size']
+        )
+        return None, pdf_content, download_msg
+    
+    convert_button = st.button(
+        "🌐 Translate Documents",
+        type="primary",
+        disabled=not can_convert,
+        help=help_text
+    )
+    
+    preview_button = st.button(
+        "👁️ Preview Translation",
+        disabled=not (selected_pdfs and selected_languages),
+        help="Stream the translation of the first part of the first selected document, without uploading anything"
+    )
+    
+    if preview_button:
+        pdf, language = selected_pdfs[0], selected_languages[0]
+        with st.spinner(f"Preparing {pdf['name']}..."):
+            markdown_chunks, pdf_content, preview_msg = fetch_source(pdf)
+            if preview_msg == "success" and markdown_chunks is None:
+                markdown_chunks, preview_msg = call_cached(
+                    cached_pdf_to_markdown_chunks,
+                    hashlib.sha256(pdf_content).hexdigest(),
+                    pdf_content
+                )
+        
+        if preview_msg != "success":
+            st.error(f"Failed to process {pdf['name']}: {preview_msg}")
+        else:
+            source_key = pdf['name'] if pdf_content is not None else sibling_markdown_key(pdf['name'])
+            st.markdown(f"**{pdf['name']}** → {language} (source: {source_key})")
+            # Tokens are shown as they arrive rather than after the whole chunk is translated
+            try:
+                st.write_stream(translate_markdown_with_llm_stream(
+                    markdown_chunks[0], language, api_key, api_endpoint, model_name, temperature
+                ))
+            except Exception as e:
+                st.error(f"Error translating to {language}: {str(e)}")
+    
+    if convert_button:
+        # Initialize conversion progress
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        # Create a container for displaying converted files as they're completed
+        converted_files_container = st.container()
+        
+        total_files = len(selected_pdfs)
+        total_tasks = total_files * len(selected_languages)  # Only translations (no original upload)
+        current_task = 0
+        successful_conversions = 0
+        failed_conversions = 0
+        converted_files = []  # Track successfully processed files
+        
+        # Fetch every selected document concurrently up front instead of one GET per loop iteration
+        downloads = {}
+        with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, total_files)) as download_pool:
+            future_to_pdf = {download_pool.submit(fetch_source, pdf): pdf for pdf in selected_pdfs}
+            for future in as_completed(future_to_pdf):
+                downloads[future_to_pdf[future]['name']] = future.result()
+                status_text.text(f"Downloaded {len(downloads)}/{total_files} document(s)...")
+        
+        # Each (file, language) translation is independent and I/O bound, so they run
+        # in a thread pool. Workers make no Streamlit calls; results are rendered here.
+        with ThreadPoolExecutor(max_workers=min(MAX_TRANSLATION_WORKERS, total_tasks)) as executor:
+            futures = {}
+            
+            for i, pdf in enumerate(selected_pdfs):
+                status_text.text(f"Processing {pdf['name']}... ({i + 1}/{total_files})")
+                
+                try:
+                    # Markdown or PDF content was prefetched above
+                    markdown_chunks, pdf_content, download_msg = downloads.pop(pdf['name'])
+                    
+                    if download_msg != "success":
+                        st.error(f"Failed to download {pdf['name']}: {download_msg}")
+                        failed_conversions += 1
+                        current_task += len(selected_languages)
+                        progress = current_task / total_tasks
+                        progress_bar.progress(progress)
+                        continue
+                    
+                    # Convert PDF to Markdown (internal step), unless a sibling .md was found
+                    convert_msg = "success"
+                    if markdown_chunks is None:
+                        markdown_chunks, convert_msg = call_cached(
+                            cached_pdf_to_markdown_chunks,
+                            hashlib.sha256(pdf_content).hexdigest(),
+                            pdf_content
+                        )
+                    
+                    if convert_msg != "success":
+                        st.error(f"Failed to process {pdf['name']}: {convert_msg}")
+                        failed_conversions += 1
+                        current_task += len(selected_languages)
+                        progress = current_task / total_tasks
+                        progress_bar.progress(progress)
+                        continue
+                    
+                    # Tell the user when an existing .md was translated instead of the PDF
+                    source_key = pdf['name'] if pdf_content is not None else sibling_markdown_key(pdf['name'])
+                    
+                    # Note: We don't upload the original PDF since it's the same as the input
+                    # We only upload translated versions
+                    
+                    # Queue a translation per language; they run while the next file is converted
+                    for lang in selected_languages:
+                        future = executor.submit(
+                            translate_pdf_to_s3,
+                            st.session_state.s3_client,
+                            st.session_state.output_bucket,
+                            markdown_chunks,
+                            pdf['name'],
+                            lang,
+                            api_key,
+                            api_endpoint,
+                            model_name,
+                            temperature,
+                            output_formats
+                        )
+                        futures[future] = (pdf, lang, source_key)
+                    
+                    successful_conversions += 1
+                    
+                except Exception as e:
+                    st.error(f"Error processing {pdf['name']}: {str(e)}")
+                    failed_conversions += 1
+                    current_task += len(selected_languages)
+                    progress = current_task / total_tasks
+                    progress_bar.progress(progress)
+            
+            status_text.text(f"Translating {len(futures)} document(s) to {', '.join(selected_languages)}...")
+            
+            for future in as_completed(futures):
+                pdf, lang, source_key = futures[future]
+                
+                try:
+                    translated_keys, translate_msg = future.result()
+                    
+                    if translate_msg != "success":
+                        st.error(f"Failed to translate {pdf['name']} to {lang}: {translate_msg}")
+                    else:
+                        # One uploaded object per requested output format
+                        for translated_key in translated_keys:
+                            # Track the translated file
+                            translated_file_info = {
+                                'original_name': pdf['name'],
+                                'key': translated_key,
+                                'output_bucket': st.session_state.output_bucket,
+                                'language': lang
+                            }
+                            converted_files.append(translated_file_info)
+                            
+                            # Immediately display the link for the translated file
+                            with converted_files_container:
+                                # Generate presigned URL for the translated file
+                                presigned_url, _ = generate_presigned_url(
+                                    st.session_state.s3_client,
+                                    translated_file_info['output_bucket'],
+                                    translated_file_info['key']
+                                )
+                                
+                                if presigned_url:
+                                    # Create clickable link with language info
+                                    filename = translated_file_info['key'].split('/')[-1]  # Get just the filename
+                                    language_label = f" ({translated_file_info['language']})" if translated_file_info['language'] != 'Original' else ""
+                                    st.success(f"✅ **{pdf['name']}** translated to {lang}! 📄 [{filename}]({presigned_url}){language_label} · source: {source_key}")
+                                else:
+                                    # Fallback if presigned URL generation fails
+                                    language_label = f" ({translated_file_info['language']})" if translated_file_info['language'] != 'Original' else ""
+                                    st.success(f"✅ **{pdf['name']}** translated to {lang}! 📄 {translated_file_info['key']}{language_label} · source: {source_key}")
+                
+                except Exception as e:
+                    st.error(f"Error translating {pdf['name']} to {lang}: {str(e)}")
+                
+                current_task += 1
+                progress = current_task / total_tasks
+                progress_bar.progress(progress)
+        
+        # New files were uploaded, so cached bucket listings are stale
+        if converted_files:
+            cached_list_pdf_files.clear()
+        
+        # Final status
+        status_text.text("Translation completed!")
+        
+        # Summary
+        if successful_conversions > 0:
+            if selected_languages:
+                st.success(f"🎉 Successfully processed {successful_conversions} file(s) and translated to {', '.join(selected_languages)}!")
+            else:
+                st.success(f"🎉 Successfully processed {successful_conversions} file(s)!")
+            
+            st.markdown("---")
+            st.info("💡 All processed files have been displayed above as they were completed. You can click on the links to download them immediately.")
+            
+        if failed_conversions > 0:
+            st.warning(f"⚠️ {failed_conversions} file(s) failed to process")
+        
+        # Clear the status right away; the toast fades on its own without holding the script
+        status_text.empty()
+        progress_bar.empty()
+        st.toast("Translation completed!", icon="🎉")
+
+
 # Initialize session state
-if 's3_client' not in st.session_state:
-    st.session_state.s3_client = None
-if 'connection_status' not in st.session_state:
-    st.session_state.connection_status = None
-if 'buckets' not in st.session_state:
-    st.session_state.buckets = []
-if 'selected_bucket' not in st.session_state:
-    st.session_state.selected_bucket = None
-if 'pdf_files' not in st.session_state:
-    st.session_state.pdf_files = []
-if 'selected_pdfs' not in st.session_state:
-    st.session_state.selected_pdfs = []
-if 'selected_pdf_indices' not in st.session_state:
-    st.session_state.selected_pdf_indices = []
-if 'output_bucket' not in st.session_state:
-    st.session_state.output_bucket = None
-if 'selected_languages' not in st.session_state:
-    st.session_state.selected_languages = []
+SESSION_DEFAULTS = {
+    's3_client': None,
+    'connection_status': None,
+    'buckets': [],
+    'bucket_names': [""],
+    'selected_bucket': None,
+    'pdf_files': [],
+    'selected_pdfs': [],
+    'selected_pdf_indices': [],
+    'output_bucket': None,
+    'selected_languages': []
+}
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
 
 # Page configuration
 st.set_page_config(
@@ -121,27 +561,42 @@ api_key = st.sidebar.text_input('API Key', type='password', value=os.getenv('API
 
 # Dynamic model selection with API integration
 if api_endpoint and api_key:
-    # Initialize session state for cached models
-    if 'cached_models' not in st.session_state:
-        st.session_state.cached_models = []
-        st.session_state.models_fetched = False
-        st.session_state.last_endpoint = ""
-        st.session_state.last_api_key = ""
-    
-    # Check if we need to refresh models (endpoint or key changed)
-    if (st.session_state.last_endpoint != api_endpoint or 
-        st.session_state.last_api_key != api_key or 
-        not st.session_state.models_fetched):
-        
+    # Models are fetched automatically for the first complete endpoint/key pair only.
+    # Later edits wait for an explicit refresh, so typing a key doesn't fire a request
+    # per intermediate value.
+    if 'models_source' not in st.session_state:
+        st.session_state.models_source = (api_endpoint, api_key)
+    
+    if st.sidebar.button("🔄 Fetch models"):
+        cached_fetch_available_models.clear()
+        st.session_state.pop('models_error', None)
+        st.session_state.models_source = (api_endpoint, api_key)
+    
+    if st.session_state.models_source != (api_endpoint, api_key):
+        st.sidebar.caption("API endpoint or key changed. Click 'Fetch models' to refresh the list.")
+    
+    models_endpoint, models_key = st.session_state.models_source
+    models_error = st.session_state.get('models_error')
+    if models_error and models_error[0] == st.session_state.models_source:
+        # Last lookup for this source failed; only retry when 'Fetch models' is clicked
+        available_models, models_msg = [], models_error[1]
+    else:
         with st.sidebar:
-            with st.spinner("Fetching available models..."):
-                st.session_state.cached_models = fetch_available_models(api_endpoint, api_key)
-                st.session_state.models_fetched = True
-                st.session_state.last_endpoint = api_endpoint
-                st.session_state.last_api_key = api_key
+            available_models, models_msg = call_cached(
+                cached_fetch_available_models,
+                models_endpoint,
+                api_key_digest(models_key),
+                models_key
+            )
+        
+        # Failures aren't cached, so remember this one per session to avoid a refetch every rerun
+        if models_msg != "success":
+            st.session_state.models_error = (st.session_state.models_source, models_msg)
+    
+    if models_msg != "success":
+        st.sidebar.error(models_msg)
     
     # Use available models or fallback to default
-    available_models = st.session_state.cached_models
     if available_models:
         # Default selection
         default_model = os.getenv('MODEL_NAME', default='vllm-llama-3-1')
@@ -177,7 +632,7 @@ temperature = st.sidebar.slider(
 # Auto-connect if all environment variables are loaded
 if env_loaded and s3_access_key and s3_secret_key and s3_url and st.session_state.connection_status != "connected":
     with st.spinner("Auto-connecting to S3..."):
-        s3_client, connection_msg = create_s3_client(s3_access_key, s3_secret_key, s3_url, ssl_verify)
+        s3_client, connection_msg = call_cached(get_s3_client, s3_access_key, s3_secret_key, s3_url, ssl_verify)
         
         if s3_client:
             st.session_state.s3_client = s3_client
@@ -188,6 +643,7 @@ if env_loaded and s3_access_key and s3_secret_key and s3_url and st.session_stat
             
             if list_msg == "success":
                 st.session_state.buckets = buckets
+                st.session_state.bucket_names = [""] + [bucket['Name'] for bucket in buckets]
                 st.success(f"✅ Auto-connected! Found {len(buckets)} bucket(s)")
             else:
                 st.error(f"❌ Auto-connection failed: {list_msg}")
@@ -204,9 +660,13 @@ if connect_button:
     else:
         with st.spinner("Connecting to S3..."):
             # Create S3 client with SSL verification setting
-            s3_client, connection_msg = create_s3_client(s3_access_key, s3_secret_key, s3_url, ssl_verify)
+            s3_client, connection_msg = call_cached(get_s3_client, s3_access_key, s3_secret_key, s3_url, ssl_verify)
             
-            if s3_client:
+            # get_s3_client is memoised, so the same credentials give back the same client.
+            # If that client is already connected (e.g. by auto-connect), don't list buckets again.
+            if s3_client and s3_client is st.session_state.s3_client and st.session_state.connection_status == "connected":
+                st.success(f"✅ Already connected! Found {len(st.session_state.buckets)} bucket(s)")
+            elif s3_client:
                 st.session_state.s3_client = s3_client
                 st.session_state.connection_status = "connected"
                 
@@ -215,6 +675,7 @@ if connect_button:
                 
                 if list_msg == "success":
                     st.session_state.buckets = buckets
+                    st.session_state.bucket_names = [""] + [bucket['Name'] for bucket in buckets]
                     st.success(f"✅ Successfully connected! Found {len(buckets)} bucket(s)")
                 else:
                     st.error(f"❌ Connection failed: {list_msg}")
@@ -230,19 +691,18 @@ if st.session_state.connection_status == "connected":
     if st.session_state.buckets:
         st.subheader("📦 Select a Bucket")
         
-        # Create bucket options for dropdown
-        bucket_options = [bucket['Name'] for bucket in st.session_state.buckets]
-        
-        # Bucket selection dropdown
+        # Bucket selection dropdown (names are computed once per connection)
         selected_bucket = st.selectbox(
             "Choose a bucket to explore:",
-            options=[""] + bucket_options,
+            options=st.session_state.bucket_names,
             index=0,
             help="Select a bucket to view its documents"
         )
         
         # Update session state when bucket selection changes
         if selected_bucket != st.session_state.selected_bucket:
+            # Presigned links are only kept for the bucket on screen
+            st.session_state.pop(f"presigns_{st.session_state.selected_bucket}", None)
             st.session_state.selected_bucket = selected_bucket
             st.session_state.pdf_files = []
             st.session_state.selected_pdfs = []
@@ -252,309 +712,29 @@ if st.session_state.connection_status == "connected":
         # Load documents when a bucket is selected
         if selected_bucket:
             with st.spinner("Loading documents..."):
-                pdf_files, pdf_msg = list_pdf_files(st.session_state.s3_client, selected_bucket)
+                pdf_files, pdf_msg = call_cached(
+                    cached_list_pdf_files,
+                    st.session_state.s3_client,
+                    s3_url,
+                    s3_access_key,
+                    selected_bucket
+                )
                 
                 if pdf_msg == "success":
                     st.session_state.pdf_files = pdf_files
                     
                     if pdf_files:
                         
-                        # Display PDF files as a list with checkboxes
-                        st.subheader("📄 Select Documents")
-                        
-                        # Initialize selected files if not already set
-                        if 'selected_pdf_indices' not in st.session_state:
-                            st.session_state.selected_pdf_indices = []
-                        
-                        selected_pdf_indices = []
-                        
-                        # Create columns for better layout
-                        col1, col2, col3 = st.columns([3, 1, 1])
-                        
-                        with col1:
-                            st.write("**File Name**")
-                        with col2:
-                            st.write("**Size**")
-                        with col3:
-                            st.write("**Select**")
-                        
-                        st.markdown("---")
-                        
-                        # Display each PDF file with checkbox
-                        for i, pdf in enumerate(pdf_files):
-                            col1, col2, col3 = st.columns([3, 1, 1])
-                            
-                            with col1:
-                                # Generate presigned URL for direct link
-                                presigned_url, _ = generate_presigned_url(
-                                    st.session_state.s3_client, 
-                                    selected_bucket, 
-                                    pdf['name']
-                                )
-                                
-                                if presigned_url:
-                                    # Make filename a clickable link
-                                    st.markdown(f"📄 [{pdf['name']}]({presigned_url})")
-                                else:
-                                    st.write(f"📄 {pdf['name']}")
-                            
-                            with col2:
-                                st.write(f"{pdf['size']:,} bytes")
-                            with col3:
-                                is_selected = st.checkbox(
-                                    "Select",
-                                    key=f"pdf_checkbox_{i}",
-                                    value=i in st.session_state.selected_pdf_indices
-                                )
-                                if is_selected:
-                                    selected_pdf_indices.append(i)
-                        
-                        # Update session state
-                        st.session_state.selected_pdf_indices = selected_pdf_indices
-                        
-                        # Get selected PDF files
-                        selected_pdfs = [pdf_files[i] for i in selected_pdf_indices]
-                        st.session_state.selected_pdfs = selected_pdfs
-                        
-                        # Add conversion section
-                        st.markdown("---")
-                        
-                        # Output bucket selection
-                        st.subheader("📤 Select Output Bucket")
-                        
-                        # Create output bucket options (same as input buckets)
-                        output_bucket_options = [bucket['Name'] for bucket in st.session_state.buckets]
-                        
-                        # Output bucket selection dropdown
-                        output_bucket = st.selectbox(
-                            "Choose output bucket for translated documents:",
-                            options=[""] + output_bucket_options,
-                            index=0,
-                            help="Select a bucket where the translated documents will be uploaded"
+                        render_translation_panel(
+                            pdf_files,
+                            selected_bucket,
+                            s3_url,
+                            s3_access_key,
+                            api_key,
+                            api_endpoint,
+                            model_name,
+                            temperature
                         )
-                        
-                        # Update session state when output bucket selection changes
-                        if output_bucket != st.session_state.output_bucket:
-                            st.session_state.output_bucket = output_bucket
-                        
-                        # Language selection
-                        st.subheader("🌐 Select Languages")
-                        
-                        # Load languages from environment variable
-                        languages_env = os.getenv("LANGUAGES", "")
-                        if languages_env:
-                            # Parse comma-separated languages and clean them
-                            available_languages = [lang.strip() for lang in languages_env.split(",") if lang.strip()]
-                        else:
-                            # Default languages if LANGUAGES env var is not set
-                            available_languages = [
-                                "English", "Spanish", "French", "German", "Italian", 
-                                "Portuguese", "Russian", "Chinese", "Japanese", "Korean",
-                                "Arabic", "Hindi", "Dutch", "Swedish", "Norwegian"
-                            ]
-                        
-                        if available_languages:
-                            # Multi-select for languages
-                            selected_languages = st.multiselect(
-                                "Choose target languages for translation:",
-                                options=available_languages,
-                                default=st.session_state.selected_languages,
-                                help="Select one or more languages to translate the documents to"
-                            )
-                            
-                            # Update session state
-                            st.session_state.selected_languages = selected_languages
-                            
-                            # Display selected languages
-                            if selected_languages:
-                                st.info(f"Selected languages: {', '.join(selected_languages)}")
-                            else:
-                                st.warning("Please select at least one language for translation")
-                        else:
-                            st.warning("No languages available. Please set the LANGUAGES environment variable with comma-separated language names.")
-                            selected_languages = []
-                        
-                        # Convert button - disabled when no files selected, no output bucket selected, or no languages selected
-                        can_convert = len(selected_pdfs) > 0 and st.session_state.output_bucket and len(selected_languages) > 0
-                        
-                        # Prepare help text based on selected languages
-                        if can_convert:
-                            help_text = f"Translate selected documents to: {', '.join(selected_languages)}"
-                        else:
-                            if len(selected_pdfs) == 0:
-                                help_text = "Please select documents to process"
-                            elif not st.session_state.output_bucket:
-                                help_text = "Please select an output bucket"
-                            else:
-                                help_text = "Please select at least one language for translation"
-                        
-                        convert_button = st.button(
-                            "🌐 Translate Documents",
-                            type="primary",
-                            disabled=not can_convert,
-                            help=help_text
-                        )
-                        
-                        if convert_button:
-                            # Initialize conversion progress
-                            progress_bar = st.progress(0)
-                            status_text = st.empty()
-                            
-                            # Create a container for displaying converted files as they're completed
-                            converted_files_container = st.container()
-                            
-                            total_files = len(selected_pdfs)
-                            total_tasks = total_files * len(selected_languages)  # Only translations (no original upload)
-                            current_task = 0
-                            successful_conversions = 0
-                            failed_conversions = 0
-                            converted_files = []  # Track successfully processed files
-                            
-                            for i, pdf in enumerate(selected_pdfs):
-                                status_text.text(f"Processing {pdf['name']}... ({i + 1}/{total_files})")
-                                
-                                try:
-                                    # Download PDF from S3
-                                    pdf_content, download_msg = download_pdf_from_s3(
-                                        st.session_state.s3_client,
-                                        selected_bucket,
-                                        pdf['name']
-                                    )
-                                    
-                                    if download_msg != "success":
-                                        st.error(f"Failed to download {pdf['name']}: {download_msg}")
-                                        failed_conversions += 1
-                                        current_task += len(selected_languages)
-                                        progress = current_task / total_tasks
-                                        progress_bar.progress(progress)
-                                        continue
-                                    
-                                    # Convert PDF to Markdown (internal step)
-                                    markdown_content, convert_msg = convert_pdf_to_markdown(pdf_content)
-                                    
-                                    if convert_msg != "success":
-                                        st.error(f"Failed to process {pdf['name']}: {convert_msg}")
-                                        failed_conversions += 1
-                                        current_task += len(selected_languages)
-                                        progress = current_task / total_tasks
-                                        progress_bar.progress(progress)
-                                        continue
-                                    
-                                    # Note: We don't upload the original PDF since it's the same as the input
-                                    # We only upload translated versions
-                                    
-                                    # Translate to each selected language
-                                    for lang in selected_languages:
-                                        status_text.text(f"Translating {pdf['name']} to {lang}... ({i + 1}/{total_files})")
-                                        
-                                        try:
-                                            # Translate markdown content
-                                            translated_content, translate_msg = translate_markdown_with_llm(
-                                                markdown_content,
-                                                lang,
-                                                api_key,
-                                                api_endpoint,
-                                                model_name,
-                                                temperature
-                                            )
-                                            
-                                            if translate_msg != "success":
-                                                st.error(f"Failed to translate {pdf['name']} to {lang}: {translate_msg}")
-                                                current_task += 1
-                                                progress = current_task / total_tasks
-                                                progress_bar.progress(progress)
-                                                continue
-                                            
-                                            # Convert translated Markdown to PDF
-                                            translated_pdf_content, pdf_convert_msg = convert_markdown_to_pdf(translated_content)
-                                            
-                                            if pdf_convert_msg != "success":
-                                                st.error(f"Failed to convert {pdf['name']} translation to {lang} to PDF: {pdf_convert_msg}")
-                                                current_task += 1
-                                                progress = current_task / total_tasks
-                                                progress_bar.progress(progress)
-                                                continue
-                                            
-                                            # Upload translated PDF to S3 (with language suffix)
-                                            translated_key, upload_msg = upload_pdf_to_s3(
-                                                st.session_state.s3_client,
-                                                st.session_state.output_bucket,
-                                                translated_pdf_content,
-                                                pdf['name'],
-                                                language=lang
-                                            )
-                                            
-                                            if upload_msg != "success":
-                                                st.error(f"Failed to upload {pdf['name']} translation to {lang}: {upload_msg}")
-                                                current_task += 1
-                                                progress = current_task / total_tasks
-                                                progress_bar.progress(progress)
-                                                continue
-                                            
-                                            # Track the translated file
-                                            translated_file_info = {
-                                                'original_name': pdf['name'],
-                                                'pdf_key': translated_key,
-                                                'output_bucket': st.session_state.output_bucket,
-                                                'language': lang
-                                            }
-                                            converted_files.append(translated_file_info)
-                                            
-                                            # Immediately display the link for the translated file
-                                            with converted_files_container:
-                                                # Generate presigned URL for the translated file
-                                                presigned_url, _ = generate_presigned_url(
-                                                    st.session_state.s3_client,
-                                                    translated_file_info['output_bucket'],
-                                                    translated_file_info['pdf_key']
-                                                )
-                                                
-                                                if presigned_url:
-                                                    # Create clickable link with language info
-                                                    pdf_filename = translated_file_info['pdf_key'].split('/')[-1]  # Get just the filename
-                                                    language_label = f" ({translated_file_info['language']})" if translated_file_info['language'] != 'Original' else ""
-                                                    st.success(f"✅ **{pdf['name']}** translated to {lang}! 📄 [{pdf_filename}]({presigned_url}){language_label}")
-                                                else:
-                                                    # Fallback if presigned URL generation fails
-                                                    language_label = f" ({translated_file_info['language']})" if translated_file_info['language'] != 'Original' else ""
-                                                    st.success(f"✅ **{pdf['name']}** translated to {lang}! 📄 {translated_file_info['pdf_key']}{language_label}")
-                                            
-                                        except Exception as e:
-                                            st.error(f"Error translating {pdf['name']} to {lang}: {str(e)}")
-                                        
-                                        current_task += 1
-                                        progress = current_task / total_tasks
-                                        progress_bar.progress(progress)
-                                    
-                                    successful_conversions += 1
-                                    
-                                except Exception as e:
-                                    st.error(f"Error processing {pdf['name']}: {str(e)}")
-                                    failed_conversions += 1
-                                    current_task += len(selected_languages)
-                                    progress = current_task / total_tasks
-                                    progress_bar.progress(progress)
-                            
-                            # Final status
-                            status_text.text("Translation completed!")
-                            
-                            # Summary
-                            if successful_conversions > 0:
-                                if selected_languages:
-                                    st.success(f"🎉 Successfully processed {successful_conversions} file(s) and translated to {', '.join(selected_languages)}!")
-                                else:
-                                    st.success(f"🎉 Successfully processed {successful_conversions} file(s)!")
-                                
-                                st.markdown("---")
-                                st.info("💡 All processed files have been displayed above as they were completed. You can click on the links to download them immediately.")
-                                
-                            if failed_conversions > 0:
-                                st.warning(f"⚠️ {failed_conversions} file(s) failed to process")
-                            
-                            # Clear the status after a delay
-                            time.sleep(2)
-                            status_text.empty()
-                            progress_bar.empty()
                             
                     else:
                         st.info("No documents found in this bucket")
@@ -1,31 +1,132 @@
 import json
+import re
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 import logging
 import os
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
 from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
 import urllib3
+from urllib3.util.retry import Retry
 import tempfile
-import shutil
+import threading
+import multiprocessing
+import io
+import gzip
+import hashlib
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import pypdfium2 as pdfium
 from markdrop import markdrop, MarkDropConfig
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
 from markdown_pdf import MarkdownPdf, Section
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 
 logging.basicConfig(level=os.getenv('LOG_LEVEL', default='INFO'))
 logger = logging.getLogger(__name__)
 
+# Multipart transfers with parallel parts (ranged GETs / multipart PUTs) for PDFs above 8 MB.
+# Lower S3_MAX_CONCURRENCY on slow links, where parallel parts just compete for bandwidth.
+PDF_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=int(os.getenv('S3_MAX_CONCURRENCY', default='8')),
+    use_threads=True
+)
+
+# Shared HTTP session so /models requests reuse the TCP+TLS connection across reruns
+_SESSION = requests.Session()
+_SESSION.headers.update({'Content-Type': 'application/json'})
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    # Once retries run out the last response is returned, so its status reaches the caller's
+    # error message; Retry-After is ignored so a 429 can't stall the sidebar for minutes
+    max_retries=Retry(
+        total=2,
+        connect=0,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False,
+        respect_retry_after_header=False
+    )
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Serialises all pypdfium2 calls; PDFium must not be entered from two threads at once
+_PDFIUM_LOCK = threading.Lock()
+
+# Resolution scale for figures markdrop extracts. Translation only uses the text and the
+# rendered PDF doesn't re-embed images, so native resolution is enough by default.
+MARKDROP_SCALE = float(os.getenv('MARKDROP_SCALE', default='1.0'))
+
+# Set MARKDROP_DEBUG=1 to keep markdrop's logs and table exports for inspection
+MARKDROP_DEBUG = os.getenv('MARKDROP_DEBUG') == '1'
+MARKDROP_DEBUG_DIR = os.path.join(tempfile.gettempdir(), 'markdrop')
+
+# First line of a markdown document that starts with '#', ignoring indentation
+FIRST_HEADING_RE = re.compile(r'^[ \t]*(#.*)$', re.MULTILINE)
+
+# Target size of the markdown chunks sent to the LLM in one request
+MARKDOWN_CHUNK_CHARS = 8192
+
+# Upper bound on in-flight LLM requests per translation batch
+MAX_TRANSLATION_CONCURRENCY = 8
+
+# Pages of one document queued in the shared process pool at a time, so a long PDF
+# doesn't hold every worker while other sessions' conversions wait behind it
+PAGE_WINDOW = os.cpu_count() or 1
+
+
+class FailedResult(Exception):
+    """Carries a non-success (value, message) result out of a Streamlit cache wrapper.
+
+    st.cache_data and st.cache_resource store nothing when the wrapped function raises, so
+    a failure is retried on the next call without evicting other sessions' cached entries.
+    """
+    def __init__(self, result):
+        super().__init__(result[1])
+        self.result = result
+
+
+def raise_on_failure(result):
+    """Return a (value, message) result unchanged, or raise FailedResult if it didn't succeed."""
+    if result[1] != "success":
+        raise FailedResult(result)
+    return result
+
+
+def call_cached(cached_func, *args):
+    """Call a cache wrapper built on raise_on_failure, turning FailedResult back into its result tuple."""
+    try:
+        return cached_func(*args)
+    except FailedResult as e:
+        return e.result
+
 
 def fetch_available_models(api_endpoint, api_key):
-    """Fetch available models from the OpenAI endpoint"""
+    """Fetch available models from the OpenAI endpoint.
+
+    Makes no Streamlit calls, so the result can be cached; errors are returned for the
+    caller to display.
+    """
     try:
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
-        }
+        headers = {'Authorization': f'Bearer {api_key}'}
         
         # Construct the models endpoint URL
         if api_endpoint.endswith('/'):
@@ -33,39 +134,31 @@ def fetch_available_models(api_endpoint, api_key):
         else:
             models_url = f"{api_endpoint}/models"
         
-        response = requests.get(models_url, headers=headers, timeout=10)
+        response = _SESSION.get(models_url, headers=headers, timeout=10)
         
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             models = [model['id'] for model in data.get('data', [])]
             # Sort models alphabetically for better UX
             models.sort()
-            return models
+            return models, "success"
         elif response.status_code == 401:
-            st.error("Authentication failed. Please check your API key.")
-            return []
+            return [], "Authentication failed. Please check your API key."
         elif response.status_code == 404:
-            st.error("Models endpoint not found. Please check your API endpoint URL.")
-            return []
+            return [], "Models endpoint not found. Please check your API endpoint URL."
         else:
-            st.error(f"Failed to fetch models: {response.status_code} - {response.text}")
-            return []
+            return [], f"Failed to fetch models: {response.status_code} - {response.text}"
             
     except requests.exceptions.ConnectionError:
-        st.error("Connection failed. Please check your API endpoint URL and internet connection.")
-        return []
+        return [], "Connection failed. Please check your API endpoint URL and internet connection."
     except requests.exceptions.Timeout:
-        st.error("Request timed out. Please try again.")
-        return []
+        return [], "Request timed out. Please try again."
     except requests.exceptions.RequestException as e:
-        st.error(f"Error connecting to API: {str(e)}")
-        return []
+        return [], f"Error connecting to API: {str(e)}"
     except json.JSONDecodeError as e:
-        st.error(f"Error parsing response: {str(e)}")
-        return []
+        return [], f"Error parsing response: {str(e)}"
     except Exception as e:
-        st.error(f"Unexpected error: {str(e)}")
-        return []
+        return [], f"Unexpected error: {str(e)}"
 
 
 def create_s3_client(access_key, secret_key, endpoint_url, verify_ssl=True):
@@ -82,9 +175,15 @@ def create_s3_client(access_key, secret_key, endpoint_url, verify_ssl=True):
         
         # Create boto3 configuration
         config = Config(
-            retries={'max_attempts': 3},
+            retries={'max_attempts': 3, 'mode': 'adaptive'},
             connect_timeout=60,
-            read_timeout=60
+            read_timeout=60,
+            # Room for the app's concurrent downloads and uploads without queueing on the pool
+            max_pool_connections=32,
+            # Keep idle pooled sockets alive between reruns instead of re-handshaking
+            tcp_keepalive=True,
+            # Path-style URLs work for both AWS and MinIO-style custom endpoints
+            s3={'addressing_style': 'path'}
         )
         
         # Create S3 client with SSL verification setting
@@ -125,18 +224,17 @@ def list_s3_buckets(s3_client):
 def list_pdf_files(s3_client, bucket_name):
     """List all PDF files in the specified S3 bucket."""
     try:
-        response = s3_client.list_objects_v2(Bucket=bucket_name)
-        pdf_files = []
-        
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                key = obj['Key']
-                if key.lower().endswith('.pdf'):
-                    pdf_files.append({
-                        'name': key,
-                        'size': obj['Size'],
-                        'last_modified': obj['LastModified']
-                    })
+        # Paginate so buckets with more than 1000 objects are listed in full
+        paginator = s3_client.get_paginator('list_objects_v2')
+        page_iter = paginator.paginate(Bucket=bucket_name, PaginationConfig={'PageSize': 1000})
+        
+        # Project each object straight to the dict the app uses. JMESPath has no lower(),
+        # so the case-insensitive .pdf check stays in Python; empty pages yield None.
+        objects = page_iter.search(
+            "Contents[].{name: Key, size: Size, last_modified: LastModified, etag: ETag}"
+        )
+        # Only the 4-character suffix is lowercased, not the whole key
+        pdf_files = [obj for obj in objects if obj and obj['name'][-4:].lower() == '.pdf']
         
         return pdf_files, "success"
     except ClientError as e:
@@ -161,70 +259,267 @@ def generate_presigned_url(s3_client, bucket_name, object_key, expiration=3600):
         return None, f"Error: {str(e)}"
 
 
-def download_pdf_from_s3(s3_client, bucket_name, object_key):
-    """Download PDF file from S3 and return the content."""
+def generate_presigned_urls(s3_client, bucket_name, object_keys, expiration=3600):
+    """Generate presigned URLs for several objects in one pass, returning a key -> URL dict."""
+    try:
+        urls = {
+            key: s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': bucket_name, 'Key': key},
+                ExpiresIn=expiration
+            )
+            for key in object_keys
+        }
+        return urls, "success"
+    except ClientError as e:
+        return {}, f"Error generating presigned URLs: {e}"
+    except Exception as e:
+        return {}, f"Error: {str(e)}"
+
+
+def sibling_markdown_key(pdf_key):
+    """Key of the .md object that sits next to a PDF: same key, .md extension."""
+    return f"{os.path.splitext(pdf_key)[0]}.md"
+
+
+def download_sibling_markdown(s3_client, bucket_name, pdf_key, not_before=None):
+    """Fetch the .md object stored next to a PDF (same key, .md extension), if there is one.
+
+    Returns (None, "not found") when no sibling exists, and (None, "stale") when it was last
+    modified before not_before (the PDF's LastModified from the listing), i.e. the PDF has
+    changed since the markdown was written. Gzip-encoded bodies, as written by
+    upload_markdown_to_s3, are decompressed.
+    """
+    markdown_key = sibling_markdown_key(pdf_key)
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=markdown_key)
+        # The GET's Last-Modified header has whole-second precision, the listing's doesn't
+        if not_before is not None and response['LastModified'] < not_before.replace(microsecond=0):
+            response['Body'].close()
+            return None, "stale"
+        body = response['Body'].read()
+        if response.get('ContentEncoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body.decode('utf-8'), "success"
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None, "not found"
+        return None, f"Error downloading markdown: {e}"
+    except Exception as e:
+        return None, f"Error: {str(e)}"
+
+
+def download_pdf_from_s3(s3_client, bucket_name, object_key, size=None):
+    """Download PDF file from S3 and return the content.
+
+    Pass the object's size from the listing when known: objects below the multipart
+    threshold are then fetched with a single GET, skipping the transfer manager's HEAD.
+    """
     try:
-        response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
-        return response['Body'].read(), "success"
+        if size is not None and size < PDF_TRANSFER_CONFIG.multipart_threshold:
+            response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+            return response['Body'].read(), "success"
+        
+        # Large objects are fetched as parallel byte-range GETs
+        buffer = io.BytesIO()
+        s3_client.download_fileobj(bucket_name, object_key, buffer, Config=PDF_TRANSFER_CONFIG)
+        return buffer.getvalue(), "success"
     except ClientError as e:
         return None, f"Error downloading PDF: {e}"
     except Exception as e:
         return None, f"Error: {str(e)}"
 
 
-def convert_pdf_to_markdown(pdf_content):
-    """Convert PDF content to Markdown using markdrop library."""
+def convert_pdf_to_markdown(pdf_path):
+    """Convert the PDF file at pdf_path to Markdown using markdrop library."""
     try:
-        # Create a temporary file to store the PDF
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_pdf:
-            temp_pdf.write(pdf_content)
-            temp_pdf_path = temp_pdf.name
-        
-        # Create a temporary directory for the markdown output
-        temp_dir = tempfile.mkdtemp()
-        
-        # Configure markdrop
-        config = MarkDropConfig(
-            image_resolution_scale=2.0,
-            log_level='INFO',
-            log_dir=os.path.join(temp_dir, 'logs'),
-            excel_dir=os.path.join(temp_dir, 'excel_tables')
-        )
-        
-        # Convert PDF to Markdown
-        markdrop(temp_pdf_path, temp_dir, config)
-        
-        # Find the generated markdown file
-        markdown_files = [f for f in os.listdir(temp_dir) if f.endswith('.md')]
-        
-        if not markdown_files:
-            return None, "No markdown file generated"
-        
-        # Read the markdown content
-        markdown_path = os.path.join(temp_dir, markdown_files[0])
-        with open(markdown_path, 'r', encoding='utf-8') as f:
-            markdown_content = f.read()
-        
-        # Clean up temporary files
-        os.unlink(temp_pdf_path)
-        shutil.rmtree(temp_dir)
+        # Markdrop's output goes to a directory that is removed on any exit
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Logs and Excel table exports are never read by the app, so they are only
+            # kept (outside the temp directory) when debugging markdrop
+            artifacts_dir = MARKDROP_DEBUG_DIR if MARKDROP_DEBUG else temp_dir
+            
+            # Configure markdrop
+            config = MarkDropConfig(
+                image_resolution_scale=MARKDROP_SCALE,
+                log_level='INFO' if MARKDROP_DEBUG else 'ERROR',
+                log_dir=os.path.join(artifacts_dir, 'logs'),
+                excel_dir=os.path.join(artifacts_dir, 'excel_tables')
+            )
+            
+            # Convert PDF to Markdown
+            markdrop(pdf_path, temp_dir, config)
+            
+            # Find the generated markdown file
+            markdown_files = [f for f in os.listdir(temp_dir) if f.endswith('.md')]
+            
+            if not markdown_files:
+                return None, "No markdown file generated"
+            
+            # Read the markdown content
+            markdown_path = os.path.join(temp_dir, markdown_files[0])
+            with open(markdown_path, 'r', encoding='utf-8') as f:
+                markdown_content = f.read()
         
         return markdown_content, "success"
     except Exception as e:
-        # Clean up temporary files in case of error
-        try:
-            if 'temp_pdf_path' in locals():
-                os.unlink(temp_pdf_path)
-            if 'temp_dir' in locals():
-                shutil.rmtree(temp_dir)
-        except:
-            pass
         return None, f"Error converting PDF to Markdown: {str(e)}"
 
 
-def get_system_prompt(language):
-    """Generate a system prompt for translating markdown content to the target language."""
-    return f"""You are a professional translator. Your task is to translate the provided markdown text to {language}.
+def split_pdf_pages(pdf_source, pages_dir):
+    """Write each page of a PDF (bytes or path) to its own single-page PDF file in pages_dir.
+
+    Returns the page paths in order. PDFium is not thread-safe, even across separate
+    documents, so all pdfium work runs under a process-wide lock.
+    """
+    page_paths = []
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_source)
+        try:
+            for index in range(len(pdf)):
+                page_path = os.path.join(pages_dir, f"page_{index + 1}.pdf")
+                page_pdf = pdfium.PdfDocument.new()
+                try:
+                    page_pdf.import_pages(pdf, [index])
+                    page_pdf.save(page_path)
+                finally:
+                    page_pdf.close()
+                page_paths.append(page_path)
+        finally:
+            pdf.close()
+    return page_paths
+
+
+def convert_pdf_to_markdown_stream(pdf_source):
+    """Convert a PDF to Markdown one page at a time, yielding (page_markdown, message) tuples.
+
+    pdf_source is the PDF's bytes or a path to it. Each page is split into its own file and
+    converted by markdrop in the shared process pool, so pages convert in parallel and
+    markdrop's memory stays out of the server process. At most PAGE_WINDOW pages are
+    queued at once. Pages are yielded in order; stops after the first failure.
+    """
+    with tempfile.TemporaryDirectory() as pages_dir:
+        try:
+            page_paths = split_pdf_pages(pdf_source, pages_dir)
+        except Exception as e:
+            yield None, f"Error opening PDF: {str(e)}"
+            return
+        
+        pool = get_pdf_process_pool()
+        pending = deque()
+        next_page = 0
+        retried = False
+        try:
+            while pending or next_page < len(page_paths):
+                try:
+                    # Top the window up, then wait for the oldest page
+                    while next_page < len(page_paths) and len(pending) < PAGE_WINDOW:
+                        pending.append((next_page, pool.submit(convert_pdf_to_markdown, page_paths[next_page])))
+                        next_page += 1
+                    index, future = pending[0]
+                    page_markdown, msg = future.result()
+                except BrokenProcessPool:
+                    if retried:
+                        yield None, "Error converting PDF to Markdown: a conversion worker process died"
+                        return
+                    # Every page queued in the broken pool is lost; queue them again on a new one
+                    retried = True
+                    pool = replace_broken_pdf_pool(pool)
+                    pending = deque(
+                        (index, pool.submit(convert_pdf_to_markdown, page_paths[index]))
+                        for index, _ in pending
+                    )
+                    continue
+                
+                pending.popleft()
+                if msg != "success":
+                    yield None, f"Page {index + 1}: {msg}"
+                    return
+                yield page_markdown, "success"
+        finally:
+            # On an early exit, drop queued pages and let running ones finish
+            # before the page files are removed
+            futures = [future for _, future in pending]
+            for future in futures:
+                future.cancel()
+            wait(futures)
+
+
+def split_markdown(markdown_content, max_chars=6000):
+    """Split markdown into chunks of about max_chars at heading or paragraph boundaries.
+
+    Never cuts inside a ``` code fence. A single block longer than max_chars is kept whole.
+    """
+    # Break the text into blocks: a heading starts a new block, a blank line ends one
+    blocks = []
+    block = []
+    in_fence = False
+    for line in markdown_content.split('\n'):
+        stripped = line.lstrip()
+        if stripped.startswith('```'):
+            in_fence = not in_fence
+        elif not in_fence and stripped.startswith('#') and block:
+            blocks.append(block)
+            block = []
+        
+        block.append(line)
+        
+        if not in_fence and not stripped:
+            blocks.append(block)
+            block = []
+    if block:
+        blocks.append(block)
+    
+    # Pack consecutive blocks into chunks up to max_chars
+    chunks = []
+    chunk = []
+    chunk_size = 0
+    for block in blocks:
+        block_size = sum(len(line) + 1 for line in block)
+        if chunk and chunk_size + block_size > max_chars:
+            chunks.append('\n'.join(chunk))
+            chunk = []
+            chunk_size = 0
+        chunk.extend(block)
+        chunk_size += block_size
+    if chunk:
+        chunks.append('\n'.join(chunk))
+    
+    return chunks
+
+
+def convert_pdf_to_markdown_chunks(pdf_source, max_chars=MARKDOWN_CHUNK_CHARS):
+    """Convert a PDF (bytes or path) to Markdown page by page and pack the pages into chunks of about max_chars."""
+    chunks = []
+    buffer = []
+    buffer_size = 0
+    
+    for page_markdown, msg in convert_pdf_to_markdown_stream(pdf_source):
+        if msg != "success":
+            return None, msg
+        
+        # Oversized pages are split at heading/paragraph boundaries; small ones pass through whole
+        pieces = split_markdown(page_markdown, max_chars) if len(page_markdown) > max_chars else [page_markdown]
+        
+        for piece in pieces:
+            # Start a new chunk when this piece would push the current one over the limit
+            if buffer and buffer_size + len(piece) > max_chars:
+                chunks.append('\n\n'.join(buffer))
+                buffer = []
+                buffer_size = 0
+            buffer.append(piece)
+            buffer_size += len(piece)
+    
+    if buffer:
+        chunks.append('\n\n'.join(buffer))
+    
+    if not chunks:
+        return None, "No markdown generated"
+    
+    return chunks, "success"
+
+
+SYSTEM_TEMPLATE = """You are a professional translator. Your task is to translate the provided markdown text to {language}.
 
 IMPORTANT INSTRUCTIONS:
 1. Translate all text content to {language} while preserving the original markdown formatting
@@ -247,29 +542,45 @@ IMPORTANT INSTRUCTIONS:
 
 Return only the translated markdown content without any additional explanations or comments."""
 
+# Built once at import; the system text is byte-identical across calls for a language,
+# which lets providers with prompt caching reuse the prefix
+_TEMPLATE = ChatPromptTemplate.from_messages([
+    ('system', SYSTEM_TEMPLATE),
+    ('human', '{content}')
+])
+
+
+@lru_cache(maxsize=64)
+def get_translation_prompt(language):
+    """Translation chat prompt with the target language filled in; only the content varies per call."""
+    return _TEMPLATE.partial(language=language)
+
+
+@lru_cache(maxsize=8)
+def _get_llm(api_key, api_endpoint, model_name, temperature):
+    """ChatOpenAI client for synchronous calls, reused so its HTTP connection pool survives between calls.
+
+    Async batches build their own client instead, since an async HTTP client is tied to
+    the event loop it was created on.
+    """
+    return ChatOpenAI(
+        openai_api_key=api_key,
+        model_name=model_name,
+        openai_api_base=api_endpoint,
+        temperature=temperature,
+        max_retries=2,
+        request_timeout=120
+    )
+
 
 def translate_markdown_with_llm(markdown_content, language, api_key, api_endpoint, model_name, temperature=0.3):
     """Translate markdown content to target language using LLM."""
     try:
-        # Initialize the LLM
-        llm = ChatOpenAI(
-            openai_api_key=api_key,
-            model_name=model_name,
-            openai_api_base=api_endpoint,
-            temperature=temperature
-        )
-        
-        # Get system prompt for the target language
-        system_prompt = get_system_prompt(language)
+        llm = _get_llm(api_key, api_endpoint, model_name, temperature)
         
-        # Prepare messages
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=markdown_content)
-        ]
+        messages = get_translation_prompt(language).format_messages(content=markdown_content)
         
-        # Generate translation
-        response = llm(messages)
+        response = llm.invoke(messages)
         
         return response.content, "success"
         
@@ -277,68 +588,151 @@ def translate_markdown_with_llm(markdown_content, language, api_key, api_endpoin
         return None, f"Error translating to {language}: {str(e)}"
 
 
+def translate_markdown_with_llm_stream(markdown_content, language, api_key, api_endpoint, model_name, temperature=0.3):
+    """Translate markdown content to target language, yielding the translation as it arrives.
+
+    Yields plain text pieces so the generator can be passed to st.write_stream, which also
+    returns the joined result. Errors are raised rather than returned, since a stream has
+    no result tuple to carry them.
+    """
+    llm = _get_llm(api_key, api_endpoint, model_name, temperature)
+    messages = get_translation_prompt(language).format_messages(content=markdown_content)
+    
+    for chunk in llm.stream(messages):
+        if chunk.content:
+            yield chunk.content
+
+
+async def translate_markdown_batch_async(items, api_key, api_endpoint, model_name, temperature=0.3, http_client=None):
+    """Translate (markdown_content, language) pairs concurrently with one ChatOpenAI instance.
+
+    Returns a (content, message) tuple per item, in order. Pass a shared httpx.AsyncClient
+    as http_client to reuse connections across calls.
+    """
+    try:
+        llm = ChatOpenAI(
+            openai_api_key=api_key,
+            model_name=model_name,
+            openai_api_base=api_endpoint,
+            temperature=temperature,
+            http_async_client=http_client
+        )
+    except Exception as e:
+        return [(None, f"Error translating to {language}: {str(e)}") for _, language in items]
+    
+    messages_list = [
+        get_translation_prompt(language).format_messages(content=markdown_content)
+        for markdown_content, language in items
+    ]
+    
+    responses = await llm.abatch(
+        messages_list,
+        config={'max_concurrency': MAX_TRANSLATION_CONCURRENCY},
+        return_exceptions=True
+    )
+    
+    return [
+        (None, f"Error translating to {language}: {str(response)}")
+        if isinstance(response, Exception)
+        else (response.content, "success")
+        for (_, language), response in zip(items, responses)
+    ]
+
+
+async def translate_chunks_async(markdown_chunks, language, api_key, api_endpoint, model_name, temperature=0.3):
+    """Translate all chunks of a document concurrently over one keep-alive HTTP/2 client."""
+    limits = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+    async with httpx.AsyncClient(http2=True, timeout=120, limits=limits) as http_client:
+        results = await translate_markdown_batch_async(
+            [(chunk, language) for chunk in markdown_chunks],
+            api_key, api_endpoint, model_name, temperature, http_client=http_client
+        )
+    
+    for _, msg in results:
+        if msg != "success":
+            return None, msg
+    
+    return '\n\n'.join(content for content, _ in results), "success"
+
+
 def convert_markdown_to_pdf(markdown_content):
     """Convert markdown content to PDF using markdown-pdf library."""
     try:
-        # Create a temporary file for the PDF output
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_pdf:
-            temp_pdf_path = temp_pdf.name
-        
         # Initialize MarkdownPdf
         pdf = MarkdownPdf()
         
         # Clean and prepare the markdown content
         # Ensure it starts with a proper heading structure
-        lines = markdown_content.strip().split('\n')
+        processed_markdown = markdown_content.strip()
         
         # Find the first heading and ensure it's level 1
-        first_heading_found = False
-        processed_lines = []
-        
-        for line in lines:
-            if line.strip().startswith('#'):
-                if not first_heading_found:
-                    # Make sure the first heading is level 1
-                    if not line.strip().startswith('# '):
-                        # Convert to level 1 heading
-                        line = '# ' + line.strip().lstrip('#').strip()
-                    first_heading_found = True
-                processed_lines.append(line)
-            else:
-                processed_lines.append(line)
+        first_heading = FIRST_HEADING_RE.search(processed_markdown)
         
-        # If no heading was found, add a default one
-        if not first_heading_found:
-            processed_lines.insert(0, "# Document")
-            processed_lines.insert(1, "")  # Add empty line after heading
-        
-        # Join the processed lines
-        processed_markdown = '\n'.join(processed_lines)
+        if first_heading is None:
+            # If no heading was found, add a default one
+            processed_markdown = "# Document\n\n" + processed_markdown
+        elif not first_heading.group(1).startswith('# '):
+            # Convert to level 1 heading
+            heading = '# ' + first_heading.group(1).lstrip('#').strip()
+            processed_markdown = processed_markdown[:first_heading.start()] + heading + processed_markdown[first_heading.end():]
         
         # Add a section with the processed markdown content
         pdf.add_section(Section(processed_markdown))
         
-        # Save the PDF to the temporary file
-        pdf.save(temp_pdf_path)
-        
-        # Read the generated PDF content
-        with open(temp_pdf_path, 'rb') as f:
-            pdf_content = f.read()
+        # Save the PDF straight into memory; PyMuPDF's save accepts a file-like target
+        buffer = io.BytesIO()
+        pdf.save(buffer)
         
-        # Clean up temporary files
-        os.unlink(temp_pdf_path)
-        
-        return pdf_content, "success"
+        return buffer.getvalue(), "success"
     except Exception as e:
-        # Clean up temporary files in case of error
-        try:
-            if 'temp_pdf_path' in locals():
-                os.unlink(temp_pdf_path)
-        except:
-            pass
         return None, f"Error converting markdown to PDF: {str(e)}"
 
 
+@st.cache_resource
+def get_pdf_process_pool():
+    """Process pool for PDF conversion and rendering, shared by all sessions.
+
+    markdrop parsing and markdown-pdf layout are CPU bound and hold the GIL, so concurrent
+    conversions only run in parallel across processes. Workers are spawned rather than
+    forked: a fork of the multi-threaded server can copy a lock (or PDFium's native state)
+    held by another thread mid-operation, and would inherit the server's whole heap.
+    """
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+
+def replace_broken_pdf_pool(broken_pool):
+    """Evict a broken PDF process pool from the resource cache and return its replacement.
+
+    A worker that dies (e.g. OOM-killed on a huge page) breaks the whole pool for every
+    session. The cache is only cleared if no other session has replaced the pool already.
+    """
+    if get_pdf_process_pool() is broken_pool:
+        get_pdf_process_pool.clear()
+    return get_pdf_process_pool()
+
+
+def run_in_pdf_pool(fn, *args):
+    """Run fn(*args) in the shared PDF process pool, retrying once on a fresh pool if it is broken."""
+    pool = get_pdf_process_pool()
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        return replace_broken_pdf_pool(pool).submit(fn, *args).result()
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_convert_markdown_to_pdf(markdown_sha256, _markdown_content):
+    """Convert markdown content to PDF in the process pool, memoised on the SHA-256 of the markdown.
+
+    Failures raise FailedResult so they aren't cached; use call_cached for a result tuple.
+    """
+    try:
+        result = run_in_pdf_pool(convert_markdown_to_pdf, _markdown_content)
+    except BrokenProcessPool:
+        result = None, "Error converting markdown to PDF: a conversion worker process died"
+    return raise_on_failure(result)
+
+
 def upload_pdf_to_s3(s3_client, bucket_name, pdf_content, original_key, language=None):
     """Upload PDF content to S3 with .pdf extension and optional language suffix."""
     try:
@@ -351,12 +745,13 @@ def upload_pdf_to_s3(s3_client, bucket_name, pdf_content, original_key, language
         else:
             pdf_key = f"{base_name}.pdf"
         
-        # Upload PDF content
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=pdf_key,
-            Body=pdf_content,
-            ContentType='application/pdf'
+        # Upload PDF content, switching to parallel multipart for large files
+        s3_client.upload_fileobj(
+            io.BytesIO(pdf_content),
+            bucket_name,
+            pdf_key,
+            ExtraArgs={'ContentType': 'application/pdf'},
+            Config=PDF_TRANSFER_CONFIG
         )
         
         return pdf_key, "success"
@@ -366,6 +761,60 @@ def upload_pdf_to_s3(s3_client, bucket_name, pdf_content, original_key, language
         return None, f"Error: {str(e)}"
 
 
+@st.cache_resource
+def get_upload_pool():
+    """Thread pool for background S3 uploads, shared by all sessions."""
+    return ThreadPoolExecutor(max_workers=8)
+
+
+def translate_pdf_to_s3(s3_client, bucket_name, markdown_chunks, original_key, language, api_key, api_endpoint, model_name, temperature=0.3, output_formats=frozenset({'pdf'})):
+    """Translate markdown chunks and upload the result with a language suffix in each requested format.
+
+    output_formats may contain 'pdf' and/or 'markdown'; the PDF render is skipped entirely
+    when only markdown is requested. Returns the list of uploaded keys.
+    Runs in a worker thread: it renders no UI, and its only Streamlit use is the caching
+    layer (cached_convert_markdown_to_pdf plus the shared PDF and upload pools), which needs
+    no script-run context. A broken PDF pool is evicted from its resource cache from here.
+    """
+    # Each worker thread runs its own event loop for the document's chunk translations
+    translated_content, translate_msg = asyncio.run(translate_chunks_async(
+        markdown_chunks, language, api_key, api_endpoint, model_name, temperature
+    ))
+    if translate_msg != "success":
+        return None, translate_msg
+
+    uploaded_keys = []
+
+    # The markdown upload runs in the background while the PDF renders
+    markdown_upload = None
+    if 'markdown' in output_formats:
+        markdown_upload = upload_markdown_to_s3_async(s3_client, bucket_name, translated_content, original_key, language=language)
+
+    pdf_key, pdf_msg = None, "success"
+    if 'pdf' in output_formats:
+        pdf_content, pdf_msg = call_cached(
+            cached_convert_markdown_to_pdf,
+            hashlib.sha256(translated_content.encode('utf-8')).hexdigest(),
+            translated_content
+        )
+        if pdf_msg == "success":
+            pdf_key, pdf_msg = upload_pdf_to_s3(s3_client, bucket_name, pdf_content, original_key, language=language)
+
+    # Always collect the markdown upload so it never outlives this call
+    if markdown_upload is not None:
+        markdown_key, upload_msg = markdown_upload.result()
+        if upload_msg != "success":
+            return None, upload_msg
+        uploaded_keys.append(markdown_key)
+
+    if pdf_msg != "success":
+        return None, pdf_msg
+    if pdf_key:
+        uploaded_keys.append(pdf_key)
+
+    return uploaded_keys, "success"
+
+
 def upload_markdown_to_s3(s3_client, bucket_name, markdown_content, original_key, language=None):
     """Upload markdown content to S3 with .md extension and optional language suffix."""
     try:
@@ -378,12 +827,13 @@ def upload_markdown_to_s3(s3_client, bucket_name, markdown_content, original_key
         else:
             markdown_key = f"{base_name}.md"
         
-        # Upload markdown content
+        # Upload markdown content gzip-compressed; HTTP clients decode it transparently
         s3_client.put_object(
             Bucket=bucket_name,
             Key=markdown_key,
-            Body=markdown_content.encode('utf-8'),
-            ContentType='text/markdown'
+            Body=gzip.compress(markdown_content.encode('utf-8')),
+            ContentType='text/markdown',
+            ContentEncoding='gzip'
         )
         
         return markdown_key, "success"
@@ -392,3 +842,7 @@ def upload_markdown_to_s3(s3_client, bucket_name, markdown_content, original_key
     except Exception as e:
         return None, f"Error: {str(e)}"
 
+
+def upload_markdown_to_s3_async(s3_client, bucket_name, markdown_content, original_key, language=None):
+    """Start upload_markdown_to_s3 in the background and return its Future."""
+    return get_upload_pool().submit(upload_markdown_to_s3, s3_client, bucket_name, markdown_content, original_key, language)